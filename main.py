@@ -1,45 +1,264 @@
 #!/usr/bin/env python3
+import argparse
+import functools
+import hashlib
+import itertools
+import math
 import os
+import random
 import sys
-from datetime import datetime, timedelta
-from dateutil import parser as date_parser
+import time
+from datetime import datetime, timedelta, timezone
+from operator import itemgetter
+from pathlib import Path
 import httpx
+import orjson
 import trio
 
-async def fetch_commits_for_pr(client, repo, pr_number, pr, username, days):
-    """Fetch commits for a single PR asynchronously."""
-    commits_url = f"https://api.github.com/repos/{repo}/pulls/{pr_number}/commits"
+_REPO_PREFIX = 'https://api.github.com/repos/'
+_REPO_PREFIX_LEN = len(_REPO_PREFIX)
+
+def repo_name(repository_url):
+    """Return owner/name from a search hit's repository_url."""
+    if repository_url.startswith(_REPO_PREFIX):
+        return repository_url[_REPO_PREFIX_LEN:]
+    return repository_url
+
+ETAG_CACHE_DIR = Path('~/.cache/ghtrack').expanduser()
+
+# ETag index loaded from the previous run, and the entries used by this one
+_etags = {}
+_etags_seen = {}
+# Cleared when the cache directory can't be used; the run then goes uncached
+_etag_cache_enabled = True
+
+def disable_etag_cache(error):
+    """Warn about a cache I/O error and carry on without the cache."""
+    global _etag_cache_enabled
+    if _etag_cache_enabled:
+        print(f"Warning: ETag cache disabled: {error}", file=sys.stderr)
+    _etag_cache_enabled = False
+
+def temp_path(path):
+    """Return a unique sibling of path to write to before renaming it into place."""
+    return path.with_name(f'{path.name}.{random.getrandbits(64):016x}.tmp')
 
+def load_etag_cache():
+    """Load the ETag index written by the previous run, if any."""
     try:
-        # Fetch all pages of commits
-        commits = []
-        page = 1
-        while True:
-            params = {'per_page': 100, 'page': page}
-            commits_response = await client.get(commits_url, params=params)
+        (ETAG_CACHE_DIR / 'bodies').mkdir(parents=True, exist_ok=True)
+        _etags.update(orjson.loads((ETAG_CACHE_DIR / 'etags.json').read_bytes()))
+    except (FileNotFoundError, orjson.JSONDecodeError):
+        pass
+    except OSError as e:
+        disable_etag_cache(e)
+
+def save_etag_cache():
+    """Write the ETags used by this run and drop cached bodies nothing refers to any more."""
+    if not _etag_cache_enabled:
+        return
+    try:
+        index_path = ETAG_CACHE_DIR / 'etags.json'
+        tmp_path = temp_path(index_path)
+        tmp_path.write_bytes(orjson.dumps(_etags_seen))
+        tmp_path.replace(index_path)
+        for body_path in (ETAG_CACHE_DIR / 'bodies').iterdir():
+            # Also sweeps up temp files left by an interrupted write
+            if body_path.suffix == '.tmp' or body_path.stem not in _etags_seen:
+                body_path.unlink(missing_ok=True)
+    except OSError as e:
+        print(f"Warning: could not save the ETag cache: {e}", file=sys.stderr)
+
+# Caps the GitHub requests in flight at once. Over HTTP/2 the connection
+# pool limit no longer does, since one connection carries many streams
+MAX_IN_FLIGHT = 16
+_request_limiter = trio.CapacityLimiter(MAX_IN_FLIGHT)
+
+MAX_ATTEMPTS = 5
+# Rate limits that reset further out than this are reported, not waited out
+MAX_RATE_LIMIT_WAIT = 120
+
+def rate_limit_delay(response):
+    """Return how long to wait before retrying a 403/429, or None if it isn't a rate limit."""
+    if 'retry-after' in response.headers:
+        return float(response.headers['retry-after'])
+    if response.headers.get('x-ratelimit-remaining') == '0' and 'x-ratelimit-reset' in response.headers:
+        return max(0.0, int(response.headers['x-ratelimit-reset']) - time.time()) + 1
+    return None
 
-            if commits_response.status_code != 200:
-                if page == 1:
-                    return None
-                break
+async def get_with_retries(client, url, params=None, headers=None):
+    """GET url, waiting out rate limits and retrying server and connection errors with jittered backoff."""
+    for attempt in range(MAX_ATTEMPTS):
+        try:
+            async with _request_limiter:
+                response = await client.get(url, params=params, headers=headers)
+        except (httpx.ConnectError, httpx.ConnectTimeout) as e:
+            if attempt + 1 == MAX_ATTEMPTS:
+                raise
+            delay = min(60, 2 ** attempt) + random.random()
+            print(f"Warning: connecting for {url} failed ({e}), retrying in {delay:.0f}s", file=sys.stderr)
+            await trio.sleep(delay)
+            continue
+
+        # Run fewer requests at once as the core budget runs out
+        remaining = response.headers.get('x-ratelimit-remaining')
+        if response.headers.get('x-ratelimit-resource') == 'core' and remaining is not None:
+            _request_limiter.total_tokens = max(1, min(MAX_IN_FLIGHT, int(remaining)))
+
+        if response.status_code in (403, 429):
+            delay = rate_limit_delay(response)
+            if delay is None or delay > MAX_RATE_LIMIT_WAIT:
+                return response
+        elif response.status_code >= 500:
+            delay = min(60, 2 ** attempt) + random.random()
+        else:
+            return response
+
+        if attempt + 1 < MAX_ATTEMPTS:
+            print(f"Warning: {response.request.url} returned {response.status_code}, retrying in {delay:.0f}s",
+                  file=sys.stderr)
+            await trio.sleep(delay)
+
+    return response
+
+def cached_response(entry, body, request):
+    """Rebuild a 200 response from a cached body and the Link header stored with it."""
+    headers = {'Link': entry['link']} if entry.get('link') else {}
+    return httpx.Response(200, headers=headers, content=body, request=request)
+
+async def cached_get(client, url, params=None, immutable=False):
+    """GET url, revalidating against the ETag cache; 304s are replayed from disk as 200s.
+
+    GitHub does not count 304 responses against the rate limit, so repeat
+    runs over unchanged pages are close to free. With immutable set, a page
+    that was also cached with immutable set is returned without asking
+    GitHub at all; entries saved before that go through revalidation.
+    Cache I/O errors disable the cache rather than failing the request.
+    """
+    if not _etag_cache_enabled:
+        return await get_with_retries(client, url, params)
+
+    key = hashlib.sha256(str(httpx.URL(url, params=params)).encode()).hexdigest()
+    body_path = trio.Path(ETAG_CACHE_DIR / 'bodies' / f'{key}.json')
+    entry = _etags.get(key)
+    body = None
+    if entry:
+        try:
+            body = await body_path.read_bytes()
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            disable_etag_cache(e)
+
+    if immutable and body is not None and entry.get('immutable'):
+        _etags_seen[key] = entry
+        return cached_response(entry, body, httpx.Request('GET', url, params=params))
+
+    headers = {'If-None-Match': entry['etag']} if body is not None else None
+    response = await get_with_retries(client, url, params, headers)
+
+    if response.status_code == 304:
+        # Revalidated now, so the body is current as of this request
+        entry = {**entry, 'immutable': immutable}
+        _etags_seen[key] = entry
+        return cached_response(entry, body, response.request)
+
+    if response.status_code == 200 and 'etag' in response.headers and _etag_cache_enabled:
+        # Write then rename, so a later 304 never replays a half-written body
+        tmp_path = temp_path(body_path)
+        try:
+            await tmp_path.write_bytes(response.content)
+            await tmp_path.replace(body_path)
+        except OSError as e:
+            disable_etag_cache(e)
+        else:
+            _etags_seen[key] = {'etag': response.headers['etag'], 'link': response.headers.get('link'),
+                                'immutable': immutable}
+
+    return response
+
+async def fetch_all_pages(client, url, params=None, is_stale=None, immutable=False):
+    """Fetch every page of a paginated list endpoint, or None if the first page fails.
+
+    When page 1 advertises a rel="last" link the remaining pages are fetched
+    concurrently; otherwise rel="next" links are followed until they run out.
+    For oldest-first lists, is_stale(item) lets the walk skip pages that can
+    only hold items older than the caller cares about. immutable is passed
+    on to cached_get() for every page.
+    """
+    params = {**(params or {}), 'per_page': 100}
+    response = await cached_get(client, url, {**params, 'page': 1}, immutable)
+    if response.status_code != 200:
+        return None
+
+    items = orjson.loads(response.content)
+
+    last_url = response.links.get('last', {}).get('url')
+    if last_url:
+        last_page = int(httpx.URL(last_url).params.get('page', 1))
+
+        pages = [items] + [None] * (last_page - 1)
+        remaining = range(2, last_page + 1)
+
+        if is_stale and last_page > 2:
+            # Fetch the newest page first; if it opens with a stale item, the
+            # pages between it and page 1 are older still and are skipped.
+            # Otherwise they are fetched concurrently as usual
+            last_response = await cached_get(client, url, {**params, 'page': last_page}, immutable)
+            if last_response.status_code != 200:
+                return items
+            last_items = orjson.loads(last_response.content)
+            if not last_items or is_stale(last_items[0]):
+                return items + last_items
+            pages[-1] = last_items
+            remaining = range(2, last_page)
+
+        async def fetch_page(page):
+            page_response = await cached_get(client, url, {**params, 'page': page}, immutable)
+            if page_response.status_code == 200:
+                pages[page - 1] = orjson.loads(page_response.content)
+
+        async with trio.open_nursery() as nursery:
+            for page in remaining:
+                nursery.start_soon(fetch_page, page)
+
+        # Keep pages up to the first failed or empty one so the result has no gaps
+        return list(itertools.chain.from_iterable(itertools.takewhile(bool, pages)))
+
+    # A list that fits on one page has no Link header at all, so this
+    # costs nothing extra in the common case
+    while 'next' in response.links:
+        response = await cached_get(client, response.links['next']['url'], None, immutable)
+        if response.status_code != 200:
+            break
+        items.extend(orjson.loads(response.content))
 
-            page_commits = commits_response.json()
-            if not page_commits:
-                break
+    return items
 
-            commits.extend(page_commits)
-            page += 1
+async def fetch_commits_for_pr(client, repo, pr_number, pr, username, cutoff):
+    """Fetch commits for a single PR asynchronously."""
+    commits_url = f"https://api.github.com/repos/{repo}/pulls/{pr_number}/commits"
+
+    try:
+        # PR commits are listed oldest first, and can't change once the PR is merged.
+        # Staleness goes by committer date: rebases and cherry-picks keep old
+        # author dates but restamp the committer date, which is never earlier
+        commits = await fetch_all_pages(
+            client, commits_url,
+            is_stale=lambda commit: datetime.fromisoformat(commit['commit']['committer']['date']) < cutoff,
+            immutable=bool(pr.get('pull_request', {}).get('merged_at')))
+        if commits is None:
+            return None
 
         user_commits = []
 
         for commit in commits:
             if commit.get('author') and commit['author'].get('login') == username:
-                commit_date = date_parser.isoparse(commit['commit']['author']['date'])
-                if commit_date >= datetime.now(commit_date.tzinfo) - timedelta(days=days):
+                commit_date = datetime.fromisoformat(commit['commit']['author']['date'])
+                if commit_date >= cutoff:
                     user_commits.append({
-                        'sha': commit['sha'][:7],
                         'date': commit_date,
-                        'message': commit['commit']['message'].split('\n')[0]
+                        'date_str': commit_date.date().isoformat()
                     })
 
         if user_commits:
@@ -67,81 +286,103 @@ async def fetch_commits_for_pr(client, repo, pr_number, pr, username, days):
 
     return None
 
-async def get_pr_activity(client, nursery, username, days, all_results, search_counter, since_date):
-    """Fetch PR activity with pagination, stopping when pages are empty."""
-    search_url = 'https://api.github.com/search/issues'
-    query = f'is:pr author:{username} updated:>={since_date}'
+# Search result fields the commit and comment fetchers read
+SEARCH_HIT_FIELDS = ('repository_url', 'number', 'title', 'html_url', 'state', 'comments_url', 'comments', 'updated_at')
+
+def search_hit(item):
+    """Project a search result onto the fields the fetchers use, dropping body, labels, reactions, etc."""
+    hit = {key: item[key] for key in SEARCH_HIT_FIELDS if key in item}
+    if 'pull_request' in item:
+        hit['pull_request'] = {'merged_at': item['pull_request'].get('merged_at')}
+    return hit
+
+async def search_issues(client, query, search_counter, label, on_hit):
+    """Run an issue search, awaiting on_hit(item) for each hit as soon as its page arrives.
 
-    # Fetch pages sequentially, stop when empty
-    for page in range(1, 11):  # Pages 1-10
-        params = {'q': query, 'per_page': 100, 'sort': 'updated', 'order': 'desc', 'page': page}
+    Pages 2..N are fetched concurrently once page 1 reports the total, so
+    hits from early pages are handed on while later pages are in flight.
+    """
+    search_url = 'https://api.github.com/search/issues'
+    per_page = 100
 
+    async def fetch_page(page):
+        params = {'q': query, 'per_page': per_page, 'sort': 'updated', 'order': 'desc', 'page': page}
         try:
-            response = await client.get(search_url, params=params)
+            # Not cached: the query carries the date, so its URL changes daily
+            response = await get_with_retries(client, search_url, params)
             search_counter['count'] += 1
 
             if response.status_code != 200:
-                print(f"Warning: PR search page {page} returned {response.status_code}", file=sys.stderr)
-                break
+                print(f"Warning: {label} search page {page} returned {response.status_code}", file=sys.stderr)
+                return None
+
+            return orjson.loads(response.content)
+        except Exception as e:
+            print(f"Error fetching {label} search page {page}: {e}", file=sys.stderr)
+            return None
 
-            data = response.json()
-            prs = data.get('items', [])
+    async def handle_page(page, data=None):
+        if data is None:
+            data = await fetch_page(page)
+        for item in (data or {}).get('items', []):
+            await on_hit(search_hit(item))
 
-            if not prs:
-                break  # Stop pagination if page is empty
+    data = await fetch_page(1)
+    if not data:
+        return
 
-            # Fetch commits for all PRs on this page using the parent nursery
-            async def fetch_and_store(pr):
-                repo = pr['repository_url'].replace('https://api.github.com/repos/', '')
-                pr_number = pr['number']
-                result = await fetch_commits_for_pr(client, repo, pr_number, pr, username, days)
-                if result:
-                    all_results.append(result)
+    # Search never returns more than the first 1000 results, so this is at most 10 pages
+    last_page = math.ceil(min(1000, data.get('total_count', 0)) / per_page)
 
-            for pr in prs:
-                nursery.start_soon(fetch_and_store, pr)
+    async with trio.open_nursery() as nursery:
+        for page in range(2, last_page + 1):
+            nursery.start_soon(handle_page, page)
+        await handle_page(1, data)
 
-        except Exception as e:
-            print(f"Error fetching page {page}: {e}", file=sys.stderr)
-            break
+async def enqueue(send_channel, queued, kind, item):
+    """Queue a search hit for the workers unless the same fetch is already queued."""
+    # Results can shift between pages as items are updated, so hits repeat
+    key = (kind, item['repository_url'], item['number'])
+    if key in queued:
+        return
+    queued.add(key)
+    await send_channel.send((kind, item))
 
-async def fetch_comments_for_item(client, item, username, days, is_issue=False, fetch_review_comments=False):
+async def get_pr_activity(client, send_channel, queued, username, search_counter, since_date):
+    """Queue a commits fetch for every PR the user authored that was updated since since_date."""
+    query = f'is:pr author:{username} updated:>={since_date}'
+    async with send_channel:
+        await search_issues(client, query, search_counter, 'PR',
+                            functools.partial(enqueue, send_channel, queued, 'commits'))
+
+async def fetch_comments_for_item(client, item, username, cutoff, is_issue=False, fetch_review_comments=False):
     """Fetch comments for a single PR or issue asynchronously."""
-    repo = item['repository_url'].replace('https://api.github.com/repos/', '')
+    repo = repo_name(item['repository_url'])
     number = item['number']
     comments_url = item['comments_url']
+    # Comments are only ever updated after they are created, so letting the
+    # server drop anything not updated since the cutoff loses nothing. Use the
+    # start of the cutoff's month so the URL, and with it the ETag cache key,
+    # stays the same across weekly runs; older comments are filtered out below
+    since_params = {'since': cutoff.strftime('%Y-%m-01T00:00:00Z')}
 
     try:
-        # Fetch all pages of regular comments
+        # The search hit already tells us whether there are any comments at all
         comments = []
-        page = 1
-        while True:
-            params = {'per_page': 100, 'page': page}
-            comments_response = await client.get(comments_url, params=params)
-
-            if comments_response.status_code != 200:
-                if page == 1:
-                    return None
-                break
-
-            page_comments = comments_response.json()
-            if not page_comments:
-                break
-
-            comments.extend(page_comments)
-            page += 1
+        if item.get('comments', 1):
+            comments = await fetch_all_pages(client, comments_url, since_params)
+            if comments is None:
+                return None
 
         user_comments = []
 
         for comment in comments:
             if comment['user']['login'] == username:
-                comment_date = date_parser.isoparse(comment['created_at'])
-                cutoff_date = datetime.now(comment_date.tzinfo) - timedelta(days=days)
-
-                if comment_date >= cutoff_date:
+                comment_date = datetime.fromisoformat(comment['created_at'])
+                if comment_date >= cutoff:
                     user_comments.append({
                         'date': comment_date,
-                        'body': comment['body'][:100] + ('...' if len(comment['body']) > 100 else '')
+                        'date_str': comment_date.date().isoformat()
                     })
 
         # Fetch review comments (inline code comments) for PRs
@@ -150,32 +391,15 @@ async def fetch_comments_for_item(client, item, username, days, is_issue=False,
             review_comments_url = f"https://api.github.com/repos/{repo}/pulls/{number}/comments"
 
             try:
-                # Fetch all pages of review comments
-                review_comments = []
-                page = 1
-                while True:
-                    params = {'per_page': 100, 'page': page}
-                    review_response = await client.get(review_comments_url, params=params)
-
-                    if review_response.status_code != 200:
-                        break
-
-                    page_review_comments = review_response.json()
-                    if not page_review_comments:
-                        break
-
-                    review_comments.extend(page_review_comments)
-                    page += 1
+                review_comments = await fetch_all_pages(client, review_comments_url, since_params) or []
 
                 for comment in review_comments:
                     if comment['user']['login'] == username:
-                        comment_date = date_parser.isoparse(comment['created_at'])
-                        cutoff_date = datetime.now(comment_date.tzinfo) - timedelta(days=days)
-
-                        if comment_date >= cutoff_date:
+                        comment_date = datetime.fromisoformat(comment['created_at'])
+                        if comment_date >= cutoff:
                             user_review_comments.append({
                                 'date': comment_date,
-                                'body': comment['body'][:100] + ('...' if len(comment['body']) > 100 else '')
+                                'date_str': comment_date.date().isoformat()
                             })
             except Exception as e:
                 print(f"Error fetching review comments for {repo}#{number}: {e}", file=sys.stderr)
@@ -208,190 +432,155 @@ async def fetch_comments_for_item(client, item, username, days, is_issue=False,
 
     return None
 
-async def fetch_pr_comments(client, nursery, username, since_date, days, all_results, search_counter):
-    """Fetch PRs where user commented (pages sequentially, stop when empty)."""
-    search_url = 'https://api.github.com/search/issues'
-    query = f'is:pr commenter:{username} updated:>={since_date} -author:{username}'
-
-    for page in range(1, 11):
-        params = {'q': query, 'per_page': 100, 'sort': 'updated', 'order': 'desc', 'page': page}
-
-        try:
-            response = await client.get(search_url, params=params)
-            search_counter['count'] += 1
-
-            if response.status_code != 200:
-                print(f"Warning: PR comment search page {page} returned {response.status_code}", file=sys.stderr)
-                break
-
-            data = response.json()
-            items = data.get('items', [])
-
-            if not items:
-                break  # Stop pagination if page is empty
-
-            # Fetch comments AND review comments for all items on this page using the parent nursery
-            async def fetch_and_store(item):
-                result = await fetch_comments_for_item(client, item, username, days, False, True)
-                if result:
-                    all_results.append(result)
-
-            for item in items:
-                nursery.start_soon(fetch_and_store, item)
-
-        except Exception as e:
-            print(f"Error fetching PR comment page {page}: {e}", file=sys.stderr)
-            break
-
-async def fetch_issue_comments(client, nursery, username, since_date, days, all_results, search_counter):
-    """Fetch issues where user commented (pages sequentially, stop when empty)."""
-    search_url = 'https://api.github.com/search/issues'
-    query = f'is:issue commenter:{username} updated:>={since_date} -author:{username}'
-
-    for page in range(1, 11):
-        params = {'q': query, 'per_page': 100, 'sort': 'updated', 'order': 'desc', 'page': page}
-
-        try:
-            response = await client.get(search_url, params=params)
-            search_counter['count'] += 1
-
-            if response.status_code != 200:
-                print(f"Warning: Issue comment search page {page} returned {response.status_code}", file=sys.stderr)
-                break
-
-            data = response.json()
-            items = data.get('items', [])
-
-            if not items:
-                break  # Stop pagination if page is empty
-
-            # Fetch comments for all items on this page using the parent nursery
-            async def fetch_and_store(item):
-                result = await fetch_comments_for_item(client, item, username, days, True)
-                if result:
-                    all_results.append(result)
-
-            for item in items:
-                nursery.start_soon(fetch_and_store, item)
-
-        except Exception as e:
-            print(f"Error fetching issue comment page {page}: {e}", file=sys.stderr)
-            break
-
-async def fetch_review_comments(client, nursery, username, since_date, days, all_results, search_counter):
-    """Fetch PRs where user made reviews or review comments (pages sequentially, stop when empty)."""
-    search_url = 'https://api.github.com/search/issues'
-    # Use reviewed-by OR commenter to catch all review activity
-    query = f'is:pr reviewed-by:{username} updated:>={since_date} -author:{username}'
-
-    for page in range(1, 11):
-        params = {'q': query, 'per_page': 100, 'sort': 'updated', 'order': 'desc', 'page': page}
-
-        try:
-            response = await client.get(search_url, params=params)
-            search_counter['count'] += 1
-
-            if response.status_code != 200:
-                print(f"Warning: Review comment search page {page} returned {response.status_code}", file=sys.stderr)
-                break
-
-            data = response.json()
-            items = data.get('items', [])
-
-            if not items:
-                break  # Stop pagination if page is empty
-
-            # Fetch review comments for all items on this page using the parent nursery
-            async def fetch_and_store(item):
-                result = await fetch_comments_for_item(client, item, username, days, False, True)
-                if result:
-                    all_results.append(result)
-
-            for item in items:
-                nursery.start_soon(fetch_and_store, item)
-
-        except Exception as e:
-            print(f"Error fetching review comment page {page}: {e}", file=sys.stderr)
-            break
-
-def generate_report(pr_activity, comment_activity, username):
-    # Collect all activity by date
-    activity_by_date = {}
-    url_to_info = {}
-
-    for pr in pr_activity.values():
-        url_to_info[pr['url']] = {
-            'title': pr['title'],
-            'state': pr['state'],
-            'commits': len(pr['commits']),
-            'comments': 0,
-            'review_comments': 0
-        }
-        for commit in pr['commits']:
-            date = commit['date'].strftime('%Y-%m-%d')
-            if date not in activity_by_date:
-                activity_by_date[date] = set()
-            activity_by_date[date].add(pr['url'])
-
-    for item in comment_activity.values():
-        url = item['url']
-        if url in url_to_info:
-            # Update existing entry (PR with both commits and comments)
-            url_to_info[url]['comments'] = len(item['comments'])
-            url_to_info[url]['review_comments'] = len(item.get('review_comments', []))
-        else:
-            # New entry (only comments, no commits)
-            url_to_info[url] = {
-                'title': item['title'],
-                'state': item['state'],
-                'commits': 0,
-                'comments': len(item['comments']),
-                'review_comments': len(item.get('review_comments', []))
-            }
-        for comment in item['comments']:
-            date = comment['date'].strftime('%Y-%m-%d')
-            if date not in activity_by_date:
-                activity_by_date[date] = set()
-            activity_by_date[date].add(url)
-        for review_comment in item.get('review_comments', []):
-            date = review_comment['date'].strftime('%Y-%m-%d')
-            if date not in activity_by_date:
-                activity_by_date[date] = set()
-            activity_by_date[date].add(url)
-
-    if not activity_by_date:
+async def fetch_comment_activity(client, send_channel, queued, username, since_date, search_counter):
+    """Queue a comments fetch for every PR and issue the user commented on or reviewed since since_date."""
+    # commenter: covers PRs and issues alike but not review comments, which
+    # reviewed-by: finds. Items found by both are queued once
+    queries = {
+        'Comment': f'commenter:{username} updated:>={since_date} -author:{username}',
+        'Review': f'is:pr reviewed-by:{username} updated:>={since_date} -author:{username}',
+    }
+    async with send_channel:
+        async with trio.open_nursery() as nursery:
+            for label, query in queries.items():
+                nursery.start_soon(search_issues, client, query, search_counter, label,
+                                   functools.partial(enqueue, send_channel, queued, 'comments'))
+
+async def _handle_pr_search_hit(client, pr, username, cutoff):
+    return await fetch_commits_for_pr(client, repo_name(pr['repository_url']), pr['number'], pr, username, cutoff)
+
+async def _handle_comment_search_hit(client, item, username, cutoff):
+    # Comments, plus review comments for PRs
+    is_issue = 'pull_request' not in item
+    return await fetch_comments_for_item(client, item, username, cutoff, is_issue, not is_issue)
+
+# Fetch to run for each kind of queued search hit
+_SEARCH_HIT_HANDLERS = {
+    'commits': _handle_pr_search_hit,
+    'comments': _handle_comment_search_hit,
+}
+
+async def activity_worker(client, receive_channel, username, cutoff, all_results, stream):
+    """Fetch commits or comments for each queued search hit until the producers are done.
+
+    With stream set, each result is printed as a JSON line as soon as it
+    arrives instead of being collected into all_results.
+    """
+    async with receive_channel:
+        async for kind, item in receive_channel:
+            # The search only filters by day. New commits and comments both bump
+            # updated_at, so an item last updated before the cutoff has nothing for us
+            if datetime.fromisoformat(item['updated_at']) < cutoff:
+                continue
+            result = await _SEARCH_HIT_HANDLERS[kind](client, item, username, cutoff)
+            if not result:
+                continue
+            if stream:
+                # print() never yields to trio, so lines from different workers can't interleave
+                print(orjson.dumps(result).decode(), flush=True)
+            else:
+                all_results.append(result)
+
+def record_activity(data, url_to_info, events):
+    """Fold one fetch result into the per-URL summary and the set of (date_str, url) events."""
+    url = data['url']
+    info = url_to_info.setdefault(url, {
+        'title': data['title'],
+        'state': data['state'],
+        'commits': 0,
+        'comments': 0,
+        'review_comments': 0
+    })
+    for kind in ('commits', 'comments', 'review_comments'):
+        records = data.get(kind, [])
+        info[kind] += len(records)
+        events.update((record['date_str'], url) for record in records)
+
+def format_activity_line(url, info):
+    """Render the report line for one PR or issue from its summary."""
+    state = info['state']
+    state_label = f"[{state}]" if state in ['closed', 'merged'] else ""
+
+    # Build activity summary
+    activity_parts = []
+    commits = info['commits']
+    comments = info['comments']
+    review_comments = info['review_comments']
+
+    if commits > 0:
+        activity_parts.append(f"{commits} commit{'s' if commits != 1 else ''}")
+    if comments > 0:
+        activity_parts.append(f"{comments} comment{'s' if comments != 1 else ''}")
+    if review_comments > 0:
+        activity_parts.append(f"{review_comments} review comment{'s' if review_comments != 1 else ''}")
+
+    activity_summary = f"({', '.join(activity_parts)})" if activity_parts else ""
+
+    return f"- {url} - {info['title']} {state_label} {activity_summary}"
+
+def generate_report(url_to_info, events, username):
+    if not events:
         print("No activity found in the last 7 days.")
         return
 
+    # A URL active on several days prints the same line each time, so render each once
+    lines = {url: format_activity_line(url, info) for url, info in url_to_info.items()}
+
+    # Newest day first, URLs in order within a day. The second sort is
+    # stable and runs over already-sorted runs, so it is close to linear
+    ordered = sorted(events)
+    ordered.sort(key=itemgetter(0), reverse=True)
+
     # Print by day
-    for date in sorted(activity_by_date.keys(), reverse=True):
-        day_name = datetime.strptime(date, '%Y-%m-%d').strftime('%A')
+    for date, group in itertools.groupby(ordered, key=itemgetter(0)):
+        day_name = datetime.fromisoformat(date).strftime('%A')
         print(f"# {day_name} ({date})")
-        for url in sorted(activity_by_date[date]):
-            info = url_to_info.get(url, {})
-            title = info.get('title', "")
-            state = info.get('state', 'unknown')
-            state_label = f"[{state}]" if state in ['closed', 'merged'] else ""
-
-            # Build activity summary
-            activity_parts = []
-            commits = info.get('commits', 0)
-            comments = info.get('comments', 0)
-            review_comments = info.get('review_comments', 0)
-
-            if commits > 0:
-                activity_parts.append(f"{commits} commit{'s' if commits != 1 else ''}")
-            if comments > 0:
-                activity_parts.append(f"{comments} comment{'s' if comments != 1 else ''}")
-            if review_comments > 0:
-                activity_parts.append(f"{review_comments} review comment{'s' if review_comments != 1 else ''}")
-
-            activity_summary = f"({', '.join(activity_parts)})" if activity_parts else ""
-
-            print(f"- {url} - {title} {state_label} {activity_summary}")
+        for _, url in group:
+            print(lines[url])
         print()
 
+async def check_credentials(client):
+    """Validate the token and print the remaining rate limit, exiting if either is unusable."""
+    try:
+        auth_response = await client.get('https://api.github.com/user')
+        if auth_response.status_code == 401:
+            print("Error: Invalid GitHub credentials", file=sys.stderr)
+            print("The provided GITHUB_TOKEN is not valid or has expired.", file=sys.stderr)
+            print("\nCreate a new token at: https://github.com/settings/tokens", file=sys.stderr)
+            print("Required scopes: 'repo' (or 'public_repo' for public repos only)", file=sys.stderr)
+            sys.exit(1)
+        elif auth_response.status_code != 200:
+            print(f"Error: GitHub API returned status {auth_response.status_code}", file=sys.stderr)
+            sys.exit(1)
+
+        # Get and display rate limit information
+        rate_limit_response = await client.get('https://api.github.com/rate_limit')
+        if rate_limit_response.status_code == 200:
+            rate_data = rate_limit_response.json()
+            core_remaining = rate_data['resources']['core']['remaining']
+            core_limit = rate_data['resources']['core']['limit']
+            search_remaining = rate_data['resources']['search']['remaining']
+            search_limit = rate_data['resources']['search']['limit']
+
+            print(f"GitHub API Rate Limits:", file=sys.stderr)
+            print(f"  Core API: {core_remaining}/{core_limit} requests remaining", file=sys.stderr)
+            print(f"  Search API: {search_remaining}/{search_limit} requests remaining", file=sys.stderr)
+            print(file=sys.stderr)
+
+            if search_remaining < 15:
+                print(f"Error: Not enough search API requests remaining ({search_remaining} < 15)", file=sys.stderr)
+                print("Please wait for the rate limit to reset before running this script.", file=sys.stderr)
+                sys.exit(1)
+    except httpx.HTTPError as e:
+        print(f"Error validating credentials: {e}", file=sys.stderr)
+        sys.exit(1)
+
 async def main():
+    parser = argparse.ArgumentParser(description="Report your GitHub PR and issue activity from the last week.")
+    parser.add_argument('--stream', action='store_true',
+                        help="print each PR or issue as a JSON line as soon as it is fetched instead of the daily report")
+    args = parser.parse_args()
+
     token = os.getenv('GITHUB_TOKEN')
     username = os.getenv('GITHUB_USERNAME')
 
@@ -405,83 +594,55 @@ async def main():
         print("Error: GITHUB_USERNAME environment variable not set", file=sys.stderr)
         sys.exit(1)
 
-    # Validate credentials and check rate limit
     headers = {
         'Authorization': f'token {token}',
         'Accept': 'application/vnd.github.v3+json'
     }
-    try:
-        async with httpx.AsyncClient(headers=headers) as client:
-            auth_response = await client.get('https://api.github.com/user')
-            if auth_response.status_code == 401:
-                print("Error: Invalid GitHub credentials", file=sys.stderr)
-                print("The provided GITHUB_TOKEN is not valid or has expired.", file=sys.stderr)
-                print("\nCreate a new token at: https://github.com/settings/tokens", file=sys.stderr)
-                print("Required scopes: 'repo' (or 'public_repo' for public repos only)", file=sys.stderr)
-                sys.exit(1)
-            elif auth_response.status_code != 200:
-                print(f"Error: GitHub API returned status {auth_response.status_code}", file=sys.stderr)
-                sys.exit(1)
-
-            # Get and display rate limit information
-            rate_limit_response = await client.get('https://api.github.com/rate_limit')
-            if rate_limit_response.status_code == 200:
-                rate_data = rate_limit_response.json()
-                core_remaining = rate_data['resources']['core']['remaining']
-                core_limit = rate_data['resources']['core']['limit']
-                search_remaining = rate_data['resources']['search']['remaining']
-                search_limit = rate_data['resources']['search']['limit']
-
-                print(f"GitHub API Rate Limits:", file=sys.stderr)
-                print(f"  Core API: {core_remaining}/{core_limit} requests remaining", file=sys.stderr)
-                print(f"  Search API: {search_remaining}/{search_limit} requests remaining", file=sys.stderr)
-                print(file=sys.stderr)
-
-                # Abort if less than 15 search requests remaining
-                if search_remaining < 15:
-                    print(f"Error: Not enough search API requests remaining ({search_remaining} < 15)", file=sys.stderr)
-                    print("Please wait for the rate limit to reset before running this script.", file=sys.stderr)
-                    sys.exit(1)
-
-    except httpx.HTTPError as e:
-        print(f"Error validating credentials: {e}", file=sys.stderr)
-        sys.exit(1)
+    limits = httpx.Limits(max_connections=20, max_keepalive_connections=20)
+    timeout = httpx.Timeout(30.0, connect=10.0)
 
     try:
-        # Fetch PR activity and comment activity in parallel
-        search_counter = {'count': 0}
-        since = (datetime.now() - timedelta(days=7)).isoformat()
-        since_date = since[:10]
+        # One client for the preflight and the fetch so its connection is reused
+        async with httpx.AsyncClient(headers=headers, http2=True, limits=limits, timeout=timeout) as client:
+            await check_credentials(client)
 
-        headers = {
-            'Authorization': f'token {token}',
-            'Accept': 'application/vnd.github.v3+json'
-        }
+            # Fetch PR activity and comment activity in parallel
+            search_counter = {'count': 0}
+            # One UTC cutoff for the whole run; GitHub reports every timestamp in UTC
+            cutoff = datetime.now(timezone.utc) - timedelta(days=7)
+            since_date = cutoff.strftime('%Y-%m-%d')
 
-        async with httpx.AsyncClient(headers=headers, limits=httpx.Limits(max_connections=20)) as client:
             all_results = []
+            # Search hits already queued, keyed by (kind, repository_url, number)
+            queued = set()
+            # A fixed pool of workers bounds in-flight fetches; the bounded
+            # channel makes the searches wait when the workers fall behind
+            send_channel, receive_channel = trio.open_memory_channel(64)
+
+            load_etag_cache()
 
             async with trio.open_nursery() as nursery:
-                # Start PR activity and comment activity fetchers
-                nursery.start_soon(get_pr_activity, client, nursery, username, 7, all_results, search_counter, since_date)
-                nursery.start_soon(fetch_pr_comments, client, nursery, username, since_date, 7, all_results, search_counter)
-                nursery.start_soon(fetch_issue_comments, client, nursery, username, since_date, 7, all_results, search_counter)
-                nursery.start_soon(fetch_review_comments, client, nursery, username, since_date, 7, all_results, search_counter)
-
-            # Separate results into pr_activity and comment_activity
-            pr_result = {}
-            comment_result = {}
+                async with send_channel, receive_channel:
+                    for _ in range(10):
+                        nursery.start_soon(activity_worker, client, receive_channel.clone(), username, cutoff, all_results, args.stream)
+                    # Start PR activity and comment activity searches
+                    nursery.start_soon(get_pr_activity, client, send_channel.clone(), queued, username, search_counter, since_date)
+                    nursery.start_soon(fetch_comment_activity, client, send_channel.clone(), queued, username, since_date, search_counter)
+
+            # Fold every result into one summary per URL and a set of dated events
+            url_to_info = {}
+            events = set()
             for result in all_results:
-                data = result['data']
-                if data.get('is_author'):
-                    pr_result[result['key']] = data
-                else:
-                    comment_result[result['key']] = data
+                record_activity(result['data'], url_to_info, events)
 
         print(f"Total search requests made: {search_counter['count']}", file=sys.stderr)
         print(file=sys.stderr)
 
-        generate_report(pr_result, comment_result, username)
+        if not args.stream:
+            generate_report(url_to_info, events, username)
+
+        # Saved last so a cache write problem can't cost a finished report
+        save_etag_cache()
     except httpx.HTTPError as e:
         print(f"Error: {e}", file=sys.stderr)
         sys.exit(1)